@@ -1,9 +1,12 @@
-from fastapi import FastAPI
+import os
+
+import uvicorn
+from fastapi import FastAPI, Query
 from pydantic import BaseModel
 
 app = FastAPI()
 @app.get("/manas/pandey/xyz")
-def add(a: int,b: int):
+def add(a: int = Query(...), b: int = Query(...)):
     return a + b
 
 
@@ -29,4 +32,10 @@ def subtract(a: int, b: int):
 def subtract_numbers(model: subtractModel):
     return subtract(model.a , model.b)
 
-print(add(3,4))
\ No newline at end of file
+print(add(3,4))
+
+
+if __name__ == "__main__":
+    # Stateless app, so one worker per core; uvicorn's default "auto" loop/http
+    # settings pick uvloop and httptools when installed
+    uvicorn.run("9_Aug_API:app", workers=os.cpu_count())
@@ -1,32 +1,89 @@
 # inmem_app.py
 # In-memory FastAPI CRUD for Products and Orders
-# - No DB: data stored in Python dicts
-# - Concurrency guarded with a threading.Lock
+# - No DB: products stored column-wise in lists/arrays, orders in a dict
+# - Async handlers on the event loop; per-store locks with optimistic reads
 # - Basic validation and clear error responses
 
-import threading
-from datetime import datetime
+import array
+import asyncio
+import itertools
+import sys
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
 from enum import Enum
-from typing import Optional, List
-
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from functools import lru_cache
+from typing import Annotated, Optional, List
+
+import msgspec
+import orjson
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.exception_handlers import http_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
 
 # App
 app = FastAPI(
     title="In-Memory Shop API",
     version="0.1.0",
     description="CRUD for Products and Orders using in-memory stores",
+    default_response_class=ORJSONResponse,
 )
 
+# Seqlock-style lock: writers hold an asyncio.Lock and keep the version odd
+# while inside. Handlers share one event-loop thread and snapshots never await,
+# so a read can't interleave with a write; the version is only odd while a
+# writer is parked inside (e.g. holding _products_lock, awaiting _orders_lock).
+# Readers then wait for that writer to release instead of reading its
+# half-done state. The even version also keys the read caches below.
+class _SeqLock:
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self.version = 0
+
+    async def __aenter__(self):
+        await self._lock.acquire()
+        self.version += 1
+
+    async def __aexit__(self, *exc_info):
+        self.version += 1
+        self._lock.release()
+
+    async def read(self, snapshot):
+        if self.version & 1:
+            async with self._lock:
+                pass
+        return snapshot()
+
 # In-memory stores and counters
-_lock = threading.Lock()
-_products_by_id: dict[int, dict] = {}
+# Lock ordering: when both are needed, take _products_lock before _orders_lock.
+_products_lock = _SeqLock()
+_orders_lock = _SeqLock()
+
+# Products as parallel columns (structure of arrays), addressed by row index.
+# Deleted rows are tombstoned (id None) and their indices pushed on _free_rows
+# for the next create to reuse, so the columns stay bounded by peak live count.
+# Stock stays a plain list so a write can never fail halfway with OverflowError
+# and desync the columns; inputs are range-checked to int64 (_INT64_MAX) anyway.
+_ids: list[Optional[int]] = []
+_skus: list[Optional[str]] = []
+_names: list[Optional[str]] = []
+_prices = array.array("d")
+_stocks: list[int] = []
+_free_rows: list[int] = []
+_id_to_idx: dict[int, int] = {}
 _sku_to_id: dict[str, int] = {}
+
 _orders_by_id: dict[int, dict] = {}
 
-_next_product_id = 1
-_next_order_id = 1
+_product_ids = itertools.count(1)
+_order_ids = itertools.count(1)
+_EPOCH = datetime(1970, 1, 1)
+# orjson encodes ints only up to 64 bits; stock and quantities are kept within
+# int64 so every stored row stays encodable
+_INT64_MAX = 2**63 - 1
 
 # Domain enums
 class OrderStatus(str, Enum):
@@ -35,18 +92,63 @@ class OrderStatus(str, Enum):
     SHIPPED = "SHIPPED"
     CANCELED = "CANCELED"
 
-# Pydantic models (requests/responses)
-class ProductCreate(BaseModel):
+# Shared error instances, raised as-is instead of built per request; the
+# handler below clears each one's traceback once its response is built, so
+# tracebacks don't pile up or pin a request's frames
+PRODUCT_NOT_FOUND = HTTPException(status_code=404, detail="Product not found")
+ORDER_NOT_FOUND = HTTPException(status_code=404, detail="Order not found")
+SKU_EXISTS = HTTPException(status_code=409, detail="SKU already exists")
+INSUFFICIENT_STOCK = HTTPException(status_code=409, detail="Insufficient stock")
+ORDER_NOT_PENDING = HTTPException(status_code=409, detail="Only PENDING orders can be deleted")
+INVALID_PRICE = HTTPException(status_code=400, detail="Price must be > 0")
+INVALID_STOCK = HTTPException(status_code=400, detail="Stock must be >= 0")
+INVALID_QUANTITY = HTTPException(status_code=400, detail="Quantity must be > 0")
+STOCK_OUT_OF_RANGE = HTTPException(status_code=409, detail="Stock would exceed the supported range")
+
+@app.exception_handler(HTTPException)
+async def _http_exception_handler(request: Request, exc: HTTPException):
+    response = await http_exception_handler(request, exc)
+    exc.__traceback__ = None
+    exc.__context__ = None
+    return response
+
+# Create bodies are msgspec Structs, decoded from raw JSON on the hot write paths
+class ProductCreate(msgspec.Struct):
     sku: str
     name: str
     price: float
-    stock: int
+    stock: Annotated[int, msgspec.Meta(le=_INT64_MAX)]
+
+class OrderCreate(msgspec.Struct):
+    product_id: int
+    quantity: Annotated[int, msgspec.Meta(le=_INT64_MAX)]
+
+# strict=False coerces like Pydantic's lax mode (e.g. "stock": 5.0 or "5")
+_product_create_decoder = msgspec.json.Decoder(ProductCreate, strict=False)
+_order_create_decoder = msgspec.json.Decoder(OrderCreate, strict=False)
+_order_batch_decoder = msgspec.json.Decoder(list[OrderCreate], strict=False)
+
+# The create endpoints read the raw body, so FastAPI can't infer their request
+# schema; publish msgspec's generated schemas via openapi_extra instead
+_, _body_schemas = msgspec.json.schema_components([ProductCreate, OrderCreate])
+
+def _json_body(schema: dict) -> dict:
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
+
+def _decode_body(decoder: msgspec.json.Decoder, body: bytes):
+    try:
+        return decoder.decode(body)
+    except msgspec.DecodeError as exc:
+        # Same 422 shape FastAPI uses for the Pydantic-validated endpoints
+        raise RequestValidationError([{"loc": ("body",), "msg": str(exc), "type": "value_error"}])
+
+# Pydantic models (requests/responses)
 
 class ProductUpdate(BaseModel):
     sku: Optional[str] = None
     name: Optional[str] = None
     price: Optional[float] = None
-    stock: Optional[int] = None
+    stock: Optional[int] = Field(None, le=_INT64_MAX)
 
 class ProductRead(BaseModel):
     id: int
@@ -55,12 +157,8 @@ class ProductRead(BaseModel):
     price: float
     stock: int
 
-class OrderCreate(BaseModel):
-    product_id: int
-    quantity: int
-
 class OrderUpdate(BaseModel):
-    quantity: Optional[int] = None
+    quantity: Optional[int] = Field(None, le=_INT64_MAX)
     status: Optional[OrderStatus] = None
 
 class OrderRead(BaseModel):
@@ -70,177 +168,296 @@ class OrderRead(BaseModel):
     status: OrderStatus
     created_at: datetime
 
+def _product_row(idx: int) -> dict:
+    return {
+        "id": _ids[idx],
+        "sku": _skus[idx],
+        "name": _names[idx],
+        "price": _prices[idx],
+        "stock": _stocks[idx],
+    }
+
+# Validated, JSON-ready order dicts are cached on each stored row under "_read"
+# and rebuilt whenever the row changes; read_order returns them as-is to ORJSON.
+# Writers call this after leaving the lock: nothing awaits in between, so no
+# reader can see an order before its "_read" is set.
+def _refresh_order_read(order: dict) -> dict:
+    # Stored created_at is epoch nanoseconds; convert to naive UTC only here
+    created_at = _EPOCH + timedelta(microseconds=order["created_at"] // 1000)
+    order["_read"] = OrderRead(**{**order, "created_at": created_at}).model_dump()
+    return order["_read"]
+
+# Encoded single-row reads, keyed by (id, store version): any write bumps the
+# version, so stale entries are never hit again and simply age out of the LRU
+@lru_cache(maxsize=4096)
+def _product_json(product_id: int, version: int) -> bytes:
+    return orjson.dumps(_product_row(_id_to_idx[product_id]))
+
+@lru_cache(maxsize=4096)
+def _order_json(order_id: int, version: int) -> bytes:
+    return orjson.dumps(_orders_by_id[order_id]["_read"])
+
 # Optional: reset helper (not used in production)
-def _reset_store_for_demo():
-    global _products_by_id, _sku_to_id, _orders_by_id
-    global _next_product_id, _next_order_id
-    with _lock:
-        _products_by_id = {}
+async def _reset_store_for_demo():
+    global _ids, _skus, _names, _prices, _stocks, _free_rows, _id_to_idx, _sku_to_id
+    global _orders_by_id, _product_ids, _order_ids
+    async with _products_lock, _orders_lock:
+        _ids = []
+        _skus = []
+        _names = []
+        _prices = array.array("d")
+        _stocks = []
+        _free_rows = []
+        _id_to_idx = {}
         _sku_to_id = {}
         _orders_by_id = {}
-        _next_product_id = 1
-        _next_order_id = 1
+        _product_ids = itertools.count(1)
+        _order_ids = itertools.count(1)
 
 # Routes: Products
 
-@app.post("/products", response_model=ProductRead, status_code=201)
-def create_product(payload: ProductCreate):
-    global _next_product_id
-    with _lock:
-        if payload.sku in _sku_to_id:
-            raise HTTPException(status_code=409, detail="SKU already exists")
+@app.post(
+    "/products",
+    response_model=ProductRead,
+    status_code=201,
+    openapi_extra=_json_body(_body_schemas["ProductCreate"]),
+)
+async def create_product(request: Request):
+    payload = _decode_body(_product_create_decoder, await request.body())
+    # Interned SKUs let _sku_to_id probes match on identity
+    sku = sys.intern(payload.sku)
+    pid = next(_product_ids)
+    async with _products_lock:
+        if sku in _sku_to_id:
+            raise SKU_EXISTS
         if payload.price <= 0:
-            raise HTTPException(status_code=400, detail="Price must be > 0")
+            raise INVALID_PRICE
         if payload.stock < 0:
-            raise HTTPException(status_code=400, detail="Stock must be >= 0")
-
-        pid = _next_product_id
-        _next_product_id += 1
-        prod = {
-            "id": pid,
-            "sku": payload.sku,
-            "name": payload.name,
-            "price": payload.price,
-            "stock": payload.stock,
-        }
-        _products_by_id[pid] = prod
-        _sku_to_id[payload.sku] = pid
-
-        return ProductRead(**prod)
-
-@app.get("/products", response_model=List[ProductRead])
-def list_products():
-    with _lock:
-        return [ProductRead(**p) for p in _products_by_id.values()]
-
-@app.get("/products/{product_id}", response_model=ProductRead)
-def read_product(product_id: int):
-    with _lock:
-        prod = _products_by_id.get(product_id)
-        if not prod:
-            raise HTTPException(status_code=404, detail="Product not found")
-        return ProductRead(**prod)
+            raise INVALID_STOCK
+
+        if _free_rows:
+            idx = _free_rows.pop()
+            _ids[idx] = pid
+            _skus[idx] = sku
+            _names[idx] = payload.name
+            _prices[idx] = payload.price
+            _stocks[idx] = payload.stock
+        else:
+            idx = len(_ids)
+            _ids.append(pid)
+            _skus.append(sku)
+            _names.append(payload.name)
+            _prices.append(payload.price)
+            _stocks.append(payload.stock)
+        _id_to_idx[pid] = idx
+        _sku_to_id[sku] = pid
+
+        return _product_row(idx)
+
+@app.get("/products")
+async def list_products():
+    def snapshot():
+        return [
+            {"id": pid, "sku": sku, "name": name, "price": price, "stock": stock}
+            for pid, sku, name, price, stock in zip(_ids, _skus, _names, _prices, _stocks)
+            if pid is not None
+        ]
+    return await _products_lock.read(snapshot)
+
+@app.get("/products/{product_id}")
+async def read_product(product_id: int):
+    def snapshot():
+        if product_id not in _id_to_idx:
+            raise PRODUCT_NOT_FOUND
+        return _product_json(product_id, _products_lock.version)
+    body = await _products_lock.read(snapshot)
+    return Response(body, media_type="application/json")
 
 @app.put("/products/{product_id}", response_model=ProductRead)
-def update_product(product_id: int, payload: ProductUpdate):
-    with _lock:
-        prod = _products_by_id.get(product_id)
-        if not prod:
-            raise HTTPException(status_code=404, detail="Product not found")
-
-        data = payload.dict(exclude_unset=True)
-
-        if "sku" in data:
-            new_sku = data["sku"]
-            if new_sku != prod["sku"] and new_sku in _sku_to_id:
-                raise HTTPException(status_code=409, detail="SKU already exists")
+async def update_product(product_id: int, payload: ProductUpdate):
+    async with _products_lock:
+        idx = _id_to_idx.get(product_id)
+        if idx is None:
+            raise PRODUCT_NOT_FOUND
+
+        fields = payload.model_fields_set
+
+        if "sku" in fields:
+            new_sku = sys.intern(payload.sku)
+            if new_sku != _skus[idx] and new_sku in _sku_to_id:
+                raise SKU_EXISTS
             # update SKU mapping
-            del _sku_to_id[prod["sku"]]
+            del _sku_to_id[_skus[idx]]
             _sku_to_id[new_sku] = product_id
-            prod["sku"] = new_sku
-
-        if "name" in data:
-            prod["name"] = data["name"]
-        if "price" in data:
-            if data["price"] <= 0:
-                raise HTTPException(status_code=400, detail="Price must be > 0")
-            prod["price"] = data["price"]
-        if "stock" in data:
-            if data["stock"] < 0:
-                raise HTTPException(status_code=400, detail="Stock must be >= 0")
-            prod["stock"] = data["stock"]
-
-        _products_by_id[product_id] = prod
-        return ProductRead(**prod)
+            _skus[idx] = new_sku
+
+        if "name" in fields:
+            _names[idx] = payload.name
+        if "price" in fields:
+            if payload.price <= 0:
+                raise INVALID_PRICE
+            _prices[idx] = payload.price
+        if "stock" in fields:
+            if payload.stock < 0:
+                raise INVALID_STOCK
+            _stocks[idx] = payload.stock
+
+        return _product_row(idx)
 
 @app.delete("/products/{product_id}", status_code=204)
-def delete_product(product_id: int):
-    with _lock:
-        prod = _products_by_id.get(product_id)
-        if not prod:
-            raise HTTPException(status_code=404, detail="Product not found")
-        del _products_by_id[product_id]
-        del _sku_to_id[prod["sku"]]
+async def delete_product(product_id: int):
+    async with _products_lock:
+        idx = _id_to_idx.pop(product_id, None)
+        if idx is None:
+            raise PRODUCT_NOT_FOUND
+        del _sku_to_id[_skus[idx]]
+        # Tombstone the row for reuse; numeric columns keep their stale values
+        _ids[idx] = None
+        _skus[idx] = None
+        _names[idx] = None
+        _free_rows.append(idx)
 
 # Routes: Orders
 
-@app.post("/orders", response_model=OrderRead, status_code=201)
-def create_order(payload: OrderCreate):
-    global _next_order_id
-    with _lock:
-        prod = _products_by_id.get(payload.product_id)
-        if not prod:
-            raise HTTPException(status_code=404, detail="Product not found")
-        if prod["stock"] < payload.quantity:
-            raise HTTPException(status_code=409, detail="Insufficient stock")
+@app.post(
+    "/orders",
+    response_model=OrderRead,
+    status_code=201,
+    openapi_extra=_json_body(_body_schemas["OrderCreate"]),
+)
+async def create_order(request: Request):
+    payload = _decode_body(_order_create_decoder, await request.body())
+    oid = next(_order_ids)
+    async with _products_lock, _orders_lock:
+        if payload.quantity <= 0:
+            raise INVALID_QUANTITY
+        idx = _id_to_idx.get(payload.product_id)
+        if idx is None:
+            raise PRODUCT_NOT_FOUND
+        if _stocks[idx] < payload.quantity:
+            raise INSUFFICIENT_STOCK
 
         # Deduct stock and create order
-        prod["stock"] -= payload.quantity
-        _products_by_id[payload.product_id] = prod
+        _stocks[idx] -= payload.quantity
 
-        oid = _next_order_id
-        _next_order_id += 1
         order = {
             "id": oid,
             "product_id": payload.product_id,
             "quantity": payload.quantity,
             "status": OrderStatus.PENDING,
-            "created_at": datetime.utcnow(),
+            "created_at": time.time_ns(),
+            # Row index into the product columns. Rows are reused after a delete,
+            # so it is only valid while _ids[idx] still equals product_id (ids are
+            # never reused)
+            "_product_idx": idx,
         }
         _orders_by_id[oid] = order
-        return OrderRead(**order)
+    return _refresh_order_read(order)
 
-@app.get("/orders/{order_id}", response_model=OrderRead)
-def read_order(order_id: int):
-    with _lock:
-        ord = _orders_by_id.get(order_id)
-        if not ord:
-            raise HTTPException(status_code=404, detail="Order not found")
-        return OrderRead(**ord)
+@app.post(
+    "/orders/batch",
+    response_model=List[OrderRead],
+    status_code=201,
+    openapi_extra=_json_body({"type": "array", "items": _body_schemas["OrderCreate"]}),
+)
+async def create_orders_batch(request: Request):
+    payloads = _decode_body(_order_batch_decoder, await request.body())
+    async with _products_lock, _orders_lock:
+        # All-or-nothing: deduct stock item by item, roll back on first failure
+        deducted: list[tuple[int, int]] = []
+        for payload in payloads:
+            idx = _id_to_idx.get(payload.product_id)
+            error = None
+            if payload.quantity <= 0:
+                error = INVALID_QUANTITY
+            elif idx is None:
+                error = PRODUCT_NOT_FOUND
+            elif _stocks[idx] < payload.quantity:
+                error = INSUFFICIENT_STOCK
+            if error:
+                for prev_idx, quantity in deducted:
+                    _stocks[prev_idx] += quantity
+                raise error
+            _stocks[idx] -= payload.quantity
+            deducted.append((idx, payload.quantity))
+
+        orders = []
+        for payload, (idx, _) in zip(payloads, deducted):
+            oid = next(_order_ids)
+            order = {
+                "id": oid,
+                "product_id": payload.product_id,
+                "quantity": payload.quantity,
+                "status": OrderStatus.PENDING,
+                "created_at": time.time_ns(),
+                "_product_idx": idx,
+            }
+            _orders_by_id[oid] = order
+            orders.append(order)
+    return [_refresh_order_read(order) for order in orders]
+
+@app.get("/orders/{order_id}")
+async def read_order(order_id: int):
+    def snapshot():
+        if order_id not in _orders_by_id:
+            raise ORDER_NOT_FOUND
+        return _order_json(order_id, _orders_lock.version)
+    body = await _orders_lock.read(snapshot)
+    return Response(body, media_type="application/json")
 
 @app.put("/orders/{order_id}", response_model=OrderRead)
-def update_order(order_id: int, payload: OrderUpdate):
-    with _lock:
+async def update_order(order_id: int, payload: OrderUpdate):
+    # Status-only updates don't touch stock, so they only need the orders lock
+    stock_lock = _products_lock if payload.quantity is not None else nullcontext()
+    async with stock_lock, _orders_lock:
         order = _orders_by_id.get(order_id)
         if not order:
-            raise HTTPException(status_code=404, detail="Order not found")
+            raise ORDER_NOT_FOUND
 
         if payload.quantity is not None:
             if payload.quantity <= 0:
-                raise HTTPException(status_code=400, detail="Quantity must be > 0")
+                raise INVALID_QUANTITY
             delta = payload.quantity - order["quantity"]
-            prod = _products_by_id.get(order["product_id"])
+            idx = order["_product_idx"]
+            if _ids[idx] != order["product_id"]:
+                raise PRODUCT_NOT_FOUND
             if delta > 0:
-                if prod["stock"] < delta:
-                    raise HTTPException(status_code=409, detail="Insufficient stock")
-                prod["stock"] -= delta
+                if _stocks[idx] < delta:
+                    raise INSUFFICIENT_STOCK
+                _stocks[idx] -= delta
             else:
-                prod["stock"] += (-delta)
-            _products_by_id[order["product_id"]] = prod
+                if _stocks[idx] - delta > _INT64_MAX:
+                    raise STOCK_OUT_OF_RANGE
+                _stocks[idx] += (-delta)
             order["quantity"] = payload.quantity
 
         if payload.status is not None:
             order["status"] = payload.status
 
-        _orders_by_id[order_id] = order
-        return OrderRead(**order)
+    return _refresh_order_read(order)
 
 @app.delete("/orders/{order_id}", status_code=204)
-def delete_order(order_id: int):
-    with _lock:
+async def delete_order(order_id: int):
+    async with _products_lock, _orders_lock:
         order = _orders_by_id.get(order_id)
         if not order:
-            raise HTTPException(status_code=404, detail="Order not found")
+            raise ORDER_NOT_FOUND
         # Allow deletion only if PENDING; restore stock
         if order["status"] != OrderStatus.PENDING:
-            raise HTTPException(status_code=409, detail="Only PENDING orders can be deleted")
-        prod = _products_by_id.get(order["product_id"])
-        if prod:
-            prod["stock"] += order["quantity"]
-            _products_by_id[order["product_id"]] = prod
+            raise ORDER_NOT_PENDING
+        idx = order["_product_idx"]
+        if _ids[idx] == order["product_id"]:
+            if _stocks[idx] + order["quantity"] > _INT64_MAX:
+                raise STOCK_OUT_OF_RANGE
+            _stocks[idx] += order["quantity"]
         del _orders_by_id[order_id]
 
 # Root
 @app.get("/")
-def root():
-    return {"msg": "In-Memory Shop API. Use /docs for OpenAPI."}
\ No newline at end of file
+async def root():
+    return {"msg": "In-Memory Shop API. Use /docs for OpenAPI."}
+
+if __name__ == "__main__":
+    # Single worker: the stores are per-process, so extra workers would not share data.
+    # uvicorn's default "auto" loop/http settings pick uvloop and httptools when installed
+    uvicorn.run(app)
@@ -1,3 +1,6 @@
+import operator
+from typing import Literal
+
 from fastapi import FastAPI
 from pydantic import BaseModel
 
@@ -7,20 +10,17 @@ class Calaculator(BaseModel):
     a: int
     b: int
 
-@app.post("/manas/pandey/xyz/multiply")
-def multiply(model: Calaculator):
-    return{"product":model.a * model.b}
+# op -> (result key, function); one route serves all four operations
+OPS = {
+    "multiply": ("product", operator.mul),
+    "divide": ("Quotient", operator.truediv),
+    "add": ("sum", operator.add),
+    "subtract": ("difference", operator.sub),
+}
 
-@app.post("/manas/pandey/xyz/divide")
-def divide(model: Calaculator):
-    if model.b ==0:
+@app.post("/manas/pandey/xyz/{op}")
+def calc(op: Literal["multiply", "divide", "add", "subtract"], model: Calaculator):
+    if op == "divide" and model.b ==0:
         return {"error": "Division by zero is not allowed"}
-    return {"Quotient":model.a/model.b}
-
-@app.post("/manas/pandey/xyz/add")
-def add(model: Calaculator):
-    return {"sum":model.a + model.b}
-
-@app.post("/manas/pandey/xyz/subtract")
-def suntract(model: Calaculator):
-    return {"difference": model.a - model.b}
\ No newline at end of file
+    key, func = OPS[op]
+    return {key: func(model.a, model.b)}
@@ -1,13 +1,26 @@
+import re
+
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, EmailStr
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, field_validator
+
+app = FastAPI(default_response_class=ORJSONResponse)
 
-app = FastAPI()
+# Compiled once at import; a plain shape check instead of email-validator
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
 class User(BaseModel):
     username: str
-    email: EmailStr
+    email: str
     password: str
 
+    @field_validator("email")
+    @classmethod
+    def check_email(cls, value: str) -> str:
+        if not EMAIL_RE.fullmatch(value):
+            raise ValueError("value is not a valid email address")
+        return value
+
 # Use username as the key, and User as the value
 user_db: dict[str, User] = {
     "sudhanshu": User(username="sudhanshu", email="abc@xyz.com", password="password123"),
@@ -15,6 +28,9 @@ user_db: dict[str, User] = {
     "mustafa": User(username="mustafa", email="ghi@xyz.com", password="password789"),
 }
 
+# Serialized view of user_db for GET /users, kept in step on every write
+_users_view: dict[str, dict] = {username: user.model_dump() for username, user in user_db.items()}
+
 # @app.post("/register")
 # def register(user: User):
 #     if len(user.password) < 8:
@@ -31,8 +47,9 @@ def add_username(user: User):
     if user.username in user_db:
         raise HTTPException(status_code=400, detail="Username already exists.")
     user_db[user.username] = user
+    _users_view[user.username] = user.model_dump()
     return {"message": f"User {user.username} added successfully."}
 
 @app.get("/users")
 def get_all_users():
-    return {username: user.dict() for username, user in user_db.items()}
\ No newline at end of file
+    return _users_view
\ No newline at end of file
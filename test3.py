@@ -1,11 +1,11 @@
 
 #another way to work 9_Aug Class...
-from fastapi import FastAPI
+from fastapi import FastAPI, Query
 from pydantic import BaseModel
 
 app = FastAPI()
 @app.get("/manas/pandey/xyz")
-def add(a: int,b: int):
+def add(a: int = Query(...), b: int = Query(...)):
     return a + b
 
 
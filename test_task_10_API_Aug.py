@@ -0,0 +1,166 @@
+import itertools
+
+from fastapi.testclient import TestClient
+
+import task_10_API_Aug as shop
+
+client = TestClient(shop.app)
+_skus = itertools.count()
+
+
+def _create_product(stock):
+    resp = client.post(
+        "/products",
+        json={"sku": f"batch-{next(_skus)}", "name": "Widget", "price": 9.5, "stock": stock},
+    )
+    assert resp.status_code == 201
+    return resp.json()["id"]
+
+
+def _stock(product_id):
+    return client.get(f"/products/{product_id}").json()["stock"]
+
+
+def test_batch_creates_all_orders():
+    pid = _create_product(stock=5)
+    resp = client.post(
+        "/orders/batch",
+        json=[{"product_id": pid, "quantity": 2}, {"product_id": pid, "quantity": 3}],
+    )
+    assert resp.status_code == 201
+    assert [o["quantity"] for o in resp.json()] == [2, 3]
+    assert _stock(pid) == 0
+
+
+def test_batch_rolls_back_on_insufficient_stock():
+    first = _create_product(stock=5)
+    second = _create_product(stock=1)
+    resp = client.post(
+        "/orders/batch",
+        json=[{"product_id": first, "quantity": 2}, {"product_id": second, "quantity": 3}],
+    )
+    assert resp.status_code == 409
+    assert _stock(first) == 5
+    assert _stock(second) == 1
+
+
+def test_batch_rejects_non_positive_quantity():
+    first = _create_product(stock=5)
+    second = _create_product(stock=5)
+    resp = client.post(
+        "/orders/batch",
+        json=[{"product_id": first, "quantity": 2}, {"product_id": second, "quantity": -3}],
+    )
+    assert resp.status_code == 400
+    assert _stock(first) == 5
+    assert _stock(second) == 5
+
+
+def test_huge_stock_does_not_desync_product_columns():
+    pid = _create_product(stock=2**63 - 1)
+    assert _stock(pid) == 2**63 - 1
+    before = client.get("/products").json()
+    columns = [len(shop._ids), len(shop._prices), len(shop._stocks)]
+
+    resp = client.post(
+        "/products",
+        json={"sku": f"batch-{next(_skus)}", "name": "Widget", "price": 1, "stock": 2**64 + 1},
+    )
+    assert resp.status_code == 422
+    assert [len(shop._ids), len(shop._prices), len(shop._stocks)] == columns
+    assert client.get("/products").json() == before
+    assert _stock(_create_product(stock=1)) == 1
+
+
+def test_orders_of_deleted_product():
+    pid = _create_product(stock=5)
+    oid = client.post("/orders", json={"product_id": pid, "quantity": 1}).json()["id"]
+    assert client.delete(f"/products/{pid}").status_code == 204
+    assert client.put(f"/orders/{oid}", json={"quantity": 2}).status_code == 404
+    assert client.delete(f"/orders/{oid}").status_code == 204
+
+
+def test_create_accepts_integral_float_stock():
+    resp = client.post(
+        "/products",
+        json={"sku": f"batch-{next(_skus)}", "name": "Widget", "price": 1, "stock": 5.0},
+    )
+    assert resp.status_code == 201
+    assert resp.json()["stock"] == 5
+
+
+def test_create_validation_error_matches_fastapi_shape():
+    created = client.post("/products", json={"sku": "x", "name": "y", "price": "abc", "stock": 1})
+    updated = client.put("/products/1", json={"price": "abc"})
+    assert created.status_code == updated.status_code == 422
+    for resp in (created, updated):
+        [error] = resp.json()["detail"]
+        assert {"loc", "msg", "type"} <= error.keys()
+
+
+def test_shared_errors_do_not_keep_tracebacks():
+    assert client.get("/products/0").status_code == 404
+    assert shop.PRODUCT_NOT_FOUND.__traceback__ is None
+
+
+def test_stock_beyond_int64_is_rejected_before_any_write():
+    pid = _create_product(stock=5)
+    before = client.get("/products").json()
+
+    resp = client.post(
+        "/products",
+        json={"sku": f"batch-{next(_skus)}", "name": "Widget", "price": 1, "stock": 2**64},
+    )
+    assert resp.status_code == 422
+    assert client.put(f"/products/{pid}", json={"stock": 2**64}).status_code == 422
+    assert client.post("/orders", json={"product_id": pid, "quantity": -(2**64)}).status_code == 400
+
+    assert client.get("/products").json() == before
+    assert _stock(pid) == 5
+
+
+def test_deleted_rows_are_reused_without_touching_old_orders():
+    pid = _create_product(stock=5)
+    oid = client.post("/orders", json={"product_id": pid, "quantity": 1}).json()["id"]
+    rows = len(shop._ids)
+    assert client.delete(f"/products/{pid}").status_code == 204
+
+    reused = _create_product(stock=7)
+    assert len(shop._ids) == rows
+    assert client.put(f"/orders/{oid}", json={"quantity": 2}).status_code == 404
+    assert client.delete(f"/orders/{oid}").status_code == 204
+    assert _stock(reused) == 7
+
+
+def test_create_endpoints_publish_request_body_schema():
+    paths = client.get("/openapi.json").json()["paths"]
+    for path, required in [
+        ("/products", {"sku", "name", "price", "stock"}),
+        ("/orders", {"product_id", "quantity"}),
+    ]:
+        schema = paths[path]["post"]["requestBody"]["content"]["application/json"]["schema"]
+        assert set(schema["required"]) == required
+    batch = paths["/orders/batch"]["post"]["requestBody"]["content"]["application/json"]["schema"]
+    assert batch["type"] == "array"
+
+
+def test_cached_reads_reflect_product_update():
+    pid = _create_product(stock=5)
+    assert _stock(pid) == 5
+    assert client.put(f"/products/{pid}", json={"stock": 8}).status_code == 200
+    assert _stock(pid) == 8
+
+
+def test_cached_reads_reflect_order_stock_deduction():
+    pid = _create_product(stock=5)
+    assert _stock(pid) == 5
+    assert client.post("/orders", json={"product_id": pid, "quantity": 2}).status_code == 201
+    assert _stock(pid) == 3
+
+
+def test_cached_reads_reflect_status_only_order_update():
+    pid = _create_product(stock=5)
+    oid = client.post("/orders", json={"product_id": pid, "quantity": 1}).json()["id"]
+    assert client.get(f"/orders/{oid}").json()["status"] == "PENDING"
+    assert client.put(f"/orders/{oid}", json={"status": "PAID"}).status_code == 200
+    assert client.get(f"/orders/{oid}").json()["status"] == "PAID"